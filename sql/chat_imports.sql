@@ -0,0 +1,11 @@
+-- Progreso de las importaciones de /api/import (una fila por usuario e import_id)
+create table if not exists chat_imports (
+    username text not null,
+    import_id text not null,
+    status text not null,
+    message text,
+    imported integer not null default 0,
+    checkpoint integer not null default 0,
+    updated_at timestamptz not null default now(),
+    primary key (username, import_id)
+);
@@ -0,0 +1,335 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+import main
+
+
+class FakeResult:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    """Subconjunto del query builder de supabase-py usado por la exportación/importación"""
+
+    def __init__(self, table, name, rows):
+        self.table = table
+        self.name = name
+        self.rows = rows
+        self.filters = []
+        self.order_key = None
+        self.limit_count = None
+        self.action = "select"
+        self.payload = None
+
+    def select(self, columns):
+        self.action = "select"
+        return self
+
+    def insert(self, rows):
+        self.action, self.payload = "insert", rows
+        return self
+
+    def upsert(self, row, on_conflict):
+        self.action, self.payload = "upsert", (row, on_conflict.split(","))
+        return self
+
+    def delete(self):
+        self.action = "delete"
+        return self
+
+    def eq(self, key, value):
+        self.filters.append(lambda row: row[key] == value)
+        return self
+
+    def gt(self, key, value):
+        self.filters.append(lambda row: row[key] > value)
+        return self
+
+    def in_(self, key, values):
+        self.filters.append(lambda row: row[key] in values)
+        return self
+
+    def order(self, key):
+        self.order_key = key
+        return self
+
+    def limit(self, count):
+        self.limit_count = count
+        return self
+
+    def execute(self):
+        if self.name == "chat_histories":
+            self.table.calls.append(self.action)
+        if self.action == "insert":
+            for row in self.payload:
+                self.table.next_id += 1
+                self.rows.append(dict(row, id=self.table.next_id))
+            return FakeResult(self.payload)
+        if self.action == "upsert":
+            row, keys = self.payload
+            self.rows[:] = [r for r in self.rows if any(r[k] != row[k] for k in keys)]
+            self.rows.append(dict(row))
+            return FakeResult([row])
+        matched = [row for row in self.rows if all(f(row) for f in self.filters)]
+        if self.action == "delete":
+            self.rows[:] = [row for row in self.rows if row not in matched]
+            return FakeResult(matched)
+        if self.order_key:
+            matched.sort(key=lambda row: row[self.order_key])
+        if self.limit_count is not None:
+            matched = matched[:self.limit_count]
+        return FakeResult([dict(row) for row in matched])
+
+
+class FakeSupabase:
+    def __init__(self, rows=None):
+        self.rows = rows if rows is not None else []
+        self.calls = []
+        self.next_id = max((row["id"] for row in self.rows), default=0)
+        self.imports = []
+
+    def table(self, name):
+        tables = {"chat_histories": self.rows, "chat_imports": self.imports}
+        return FakeQuery(self, name, tables[name])
+
+
+def make_row(username, index, row_id=None):
+    return {
+        "id": row_id if row_id is not None else index + 1,
+        "username": username,
+        "chat_id": f"chat-{index:03d}",
+        "title": f"Chat {index}",
+        "messages": json.dumps([{"role": "user", "content": f"hola {index}"}], separators=(",", ":")),
+        "created_at": "2025-01-01T00:00:00",
+    }
+
+
+def ndjson(chats):
+    return "".join(json.dumps(chat) + "\n" for chat in chats).encode()
+
+
+def make_chat(index):
+    return {
+        "id": f"chat-{index:03d}",
+        "title": f"Chat {index}",
+        "messages": [{"role": "user", "content": f"hola {index}"}],
+        "created_at": "2025-01-01T00:00:00",
+    }
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "EXPORT_PAGE_SIZE", 3)
+    monkeypatch.setattr(main, "IMPORT_BATCH_SIZE", 2)
+    return TestClient(main.app)
+
+
+def test_export_page_boundary(client, monkeypatch):
+    fake = FakeSupabase([make_row("ana", i) for i in range(6)] + [make_row("otro", 9)])
+    monkeypatch.setattr(main, "supabase", fake)
+
+    response = client.get("/api/export/ana")
+
+    assert response.status_code == 200
+    lines = response.content.decode().splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [f"chat-{i:03d}" for i in range(6)]
+    # 6 filas con páginas de 3: la tercera página vacía cierra la exportación
+    assert fake.calls == ["select", "select", "select"]
+
+
+def test_export_keeps_duplicate_chat_ids_across_pages(client, monkeypatch):
+    # chat-002 está repetido justo en el límite entre la primera y la segunda página
+    rows = [make_row("ana", i) for i in range(3)] + [make_row("ana", 2, row_id=4), make_row("ana", 5)]
+    monkeypatch.setattr(main, "supabase", FakeSupabase(rows))
+
+    response = client.get("/api/export/ana")
+
+    ids = [json.loads(line)["id"] for line in response.content.decode().splitlines()]
+    assert ids == ["chat-000", "chat-001", "chat-002", "chat-002", "chat-005"]
+
+
+def test_export_storage_error_returns_500(client, monkeypatch):
+    monkeypatch.setattr(main, "supabase", None)
+
+    response = client.get("/api/export/ana")
+
+    assert response.status_code == 500
+
+
+def test_export_import_round_trip(client, monkeypatch):
+    source = FakeSupabase([make_row("ana", i) for i in range(5)])
+    monkeypatch.setattr(main, "supabase", source)
+    exported = client.get("/api/export/ana").content
+
+    target = FakeSupabase()
+    monkeypatch.setattr(main, "supabase", target)
+    response = client.post("/api/import", params={"username": "ana", "import_id": "copia"}, content=exported)
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "import_id": "copia",
+        "status": "completada",
+        "message": "Importación completada",
+        "imported": 5,
+        "checkpoint": 5,
+    }
+    strip_id = lambda row: {k: v for k, v in row.items() if k != "id"}
+    assert sorted(map(strip_id, target.rows), key=lambda row: row["chat_id"]) == list(map(strip_id, source.rows))
+
+
+def test_gzip_round_trip(client, monkeypatch):
+    monkeypatch.setattr(main, "supabase", FakeSupabase([make_row("ana", i) for i in range(4)]))
+    exported = client.get("/api/export/ana", params={"gzip": True}).content
+    assert json.loads(gzip.decompress(exported).splitlines()[0])["id"] == "chat-000"
+
+    target = FakeSupabase()
+    monkeypatch.setattr(main, "supabase", target)
+    response = client.post("/api/import", params={"username": "ana"}, content=exported)
+
+    assert response.json()["imported"] == 4
+    assert len(target.rows) == 4
+
+
+def test_import_resume_from_and_updates_existing(client, monkeypatch):
+    target = FakeSupabase([make_row("ana", 3)])
+    monkeypatch.setattr(main, "supabase", target)
+    body = ndjson([make_chat(i) for i in range(5)])
+
+    response = client.post("/api/import", params={"username": "ana", "resume_from": 3}, content=body)
+
+    assert response.json()["imported"] == 2
+    assert response.json()["checkpoint"] == 5
+    assert sorted(row["chat_id"] for row in target.rows) == ["chat-003", "chat-004"]
+    # Un lote con un chat existente sigue siendo dos llamadas, no una por fila
+    assert target.calls == ["delete", "insert"]
+
+
+def test_import_invalid_line_reports_checkpoint(client, monkeypatch):
+    target = FakeSupabase()
+    monkeypatch.setattr(main, "supabase", target)
+    # Lote de 2: la línea 3 queda pendiente cuando falla la línea 4
+    body = ndjson([make_chat(i) for i in range(3)]) + b"{no es json\n" + ndjson([make_chat(9)])
+
+    response = client.post("/api/import", params={"username": "ana"}, content=body)
+
+    assert response.status_code == 400
+    detail = response.json()["detail"]
+    assert detail["checkpoint"] == 3
+    assert detail["imported"] == 3
+    assert "Línea 4" in detail["message"]
+    assert len(target.rows) == 3
+
+
+def test_import_replaces_duplicated_existing_chat(client, monkeypatch):
+    target = FakeSupabase([make_row("ana", 1), make_row("ana", 1, row_id=7), make_row("otro", 1, row_id=8)])
+    monkeypatch.setattr(main, "supabase", target)
+    renamed = dict(make_chat(1), title="Nuevo título")
+
+    client.post("/api/import", params={"username": "ana"}, content=ndjson([renamed]))
+
+    assert sorted((row["username"], row["title"]) for row in target.rows) == [("ana", "Nuevo título"), ("otro", "Chat 1")]
+
+
+def test_import_dedupes_chat_within_batch(client, monkeypatch):
+    target = FakeSupabase()
+    monkeypatch.setattr(main, "supabase", target)
+    renamed = dict(make_chat(1), title="Nuevo título")
+
+    response = client.post("/api/import", params={"username": "ana"}, content=ndjson([make_chat(1), renamed]))
+
+    assert response.json()["imported"] == 1
+    assert [row["title"] for row in target.rows] == ["Nuevo título"]
+
+
+def test_import_line_too_long(client, monkeypatch):
+    monkeypatch.setattr(main, "supabase", FakeSupabase())
+    monkeypatch.setattr(main, "MAX_IMPORT_LINE_BYTES", 50)
+
+    response = client.post("/api/import", params={"username": "ana"}, content=ndjson([make_chat(1)]))
+
+    assert response.status_code == 413
+    assert response.json()["detail"]["checkpoint"] == 0
+
+
+def test_import_truncated_gzip(client, monkeypatch):
+    monkeypatch.setattr(main, "supabase", FakeSupabase())
+    body = gzip.compress(ndjson([make_chat(i) for i in range(3)]))
+
+    response = client.post("/api/import", params={"username": "ana"}, content=body[:-10])
+
+    assert response.status_code == 400
+    assert response.json()["detail"]["message"] == "Archivo gzip incompleto"
+
+
+async def collect_lines(chunks):
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+    return [line async for line in main.iter_ndjson_lines(stream())]
+
+
+def test_iter_lines_split_chunks_and_multi_member_gzip():
+    body = gzip.compress(b'{"a":1}\n{"b":') + gzip.compress(b'2}\n{"c":3}')
+    # Fragmentos de 1 byte: la detección de gzip y las líneas cruzan fragmentos
+    chunks = [body[i:i + 1] for i in range(len(body))]
+
+    assert asyncio.run(collect_lines(chunks)) == [b'{"a":1}', b'{"b":2}', b'{"c":3}']
+
+
+def test_iter_lines_plain_single_byte_body():
+    assert asyncio.run(collect_lines([b"x"])) == [b"x"]
+
+
+def test_import_progress_is_persisted_and_resumed_by_import_id(client, monkeypatch):
+    target = FakeSupabase()
+    monkeypatch.setattr(main, "supabase", target)
+    chats = [make_chat(i) for i in range(5)]
+    params = {"username": "ana", "import_id": "migracion"}
+
+    # Primer intento: falla en la línea 4 con dos lotes guardados
+    body = ndjson(chats[:3]) + b"{roto\n"
+    assert client.post("/api/import", params=params, content=body).status_code == 400
+
+    progress = client.get("/api/import/ana/migracion").json()
+    assert (progress["status"], progress["checkpoint"], progress["imported"]) == ("error", 3, 3)
+
+    # Reintento con el mismo import_id y sin resume_from: continúa tras la línea 3
+    response = client.post("/api/import", params=params, content=ndjson(chats))
+
+    assert response.json()["checkpoint"] == 5
+    assert response.json()["imported"] == 5
+    assert sorted(row["chat_id"] for row in target.rows) == [chat["id"] for chat in chats]
+    assert client.get("/api/import/ana/migracion").json()["status"] == "completada"
+
+
+def test_import_progress_not_found(client, monkeypatch):
+    monkeypatch.setattr(main, "supabase", FakeSupabase())
+
+    assert client.get("/api/import/ana/desconocida").status_code == 404
+
+
+def test_import_client_disconnect_saves_pending_batch(monkeypatch):
+    target = FakeSupabase()
+    monkeypatch.setattr(main, "supabase", target)
+    monkeypatch.setattr(main, "IMPORT_BATCH_SIZE", 10)
+    messages = [
+        {"type": "http.request", "body": ndjson([make_chat(i) for i in range(3)]), "more_body": True},
+        {"type": "http.disconnect"},
+    ]
+
+    async def receive():
+        return messages.pop(0)
+
+    request = Request({"type": "http", "method": "POST", "headers": [], "query_string": b""}, receive)
+    result = asyncio.run(main.import_chats(request, "ana", import_id="corte"))
+
+    assert result["status"] == "interrumpida"
+    assert len(target.rows) == 3
+    assert target.imports[0]["checkpoint"] == 3
+    assert target.imports[0]["status"] == "interrumpida"
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def probes(monkeypatch):
+    """Sustituir las verificaciones de OpenRouter y Supabase y contar las llamadas"""
+    state = {
+        "upstream": {"ok": True, "error": None},
+        "storage": {"ok": True, "error": None},
+        "calls": 0,
+    }
+
+    async def check_upstream():
+        state["calls"] += 1
+        return state["upstream"]
+
+    async def check_storage():
+        state["calls"] += 1
+        return state["storage"]
+
+    monkeypatch.setattr(main, "_check_upstream", check_upstream)
+    monkeypatch.setattr(main, "_check_storage", check_storage)
+    monkeypatch.setattr(main, "_readiness_cache", None)
+    monkeypatch.setattr(main, "_readiness_checked_at", 0.0)
+    monkeypatch.setattr(main, "_readiness_lock", asyncio.Lock())
+    return state
+
+
+def test_ready_is_cached_within_ttl(probes, monkeypatch):
+    monkeypatch.setattr(main, "READINESS_CACHE_TTL", 60)
+    client = TestClient(main.app)
+
+    first = client.get("/ready")
+    second = client.get("/ready")
+
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    assert probes["calls"] == 2  # una sola ronda: upstream + storage
+
+
+def test_ready_reprobes_after_ttl(probes, monkeypatch):
+    monkeypatch.setattr(main, "READINESS_CACHE_TTL", 0)
+    client = TestClient(main.app)
+
+    client.get("/ready")
+    client.get("/ready")
+
+    assert probes["calls"] == 4
+
+
+def test_ready_returns_503_when_a_check_fails(probes):
+    probes["storage"] = {"ok": False, "error": "timeout"}
+    client = TestClient(main.app)
+
+    response = client.get("/ready")
+
+    assert response.status_code == 503
+    body = response.json()
+    assert body["ready"] is False
+    assert body["checks"] == {
+        "upstream": {"ok": True, "error": None},
+        "storage": {"ok": False, "error": "timeout"},
+    }
+
+
+@pytest.mark.parametrize("storage_ok, database", [
+    (True, "supabase_connected"),
+    (False, "supabase_unavailable"),
+])
+def test_health_after_lifespan(probes, monkeypatch, storage_ok, database):
+    probes["storage"] = {"ok": storage_ok, "error": None if storage_ok else "timeout"}
+    monkeypatch.setattr(main, "create_client", lambda *args, **kwargs: object())
+    monkeypatch.setattr(main, "startup_seconds", None)
+    monkeypatch.setattr(main, "storage_ok", False)
+    monkeypatch.setattr(main, "supabase", None)
+    monkeypatch.setattr(main, "probe_supabase", None)
+    monkeypatch.setattr(main, "http_client", None)
+
+    with TestClient(main.app) as client:
+        body = client.get("/health").json()
+
+    assert body["database"] == database
+    assert isinstance(body["startup_seconds"], float)
+    assert body["startup_seconds"] > 0
+    # El arranque solo verifica Supabase, no OpenRouter
+    assert probes["calls"] == 1